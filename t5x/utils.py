@@ -921,6 +921,33 @@ def create_learning_rate_scheduler(
   return step_fn
 
 
+_MAX_CHECKPOINT_SCAN_THREADS = 16
+
+
+def _get_restore_paths(restore_cfg: RestoreCheckpointConfig) -> Sequence[str]:
+  if isinstance(restore_cfg.path, str):
+    return [restore_cfg.path]
+  return restore_cfg.path
+
+
+def _get_checkpoint_paths(ckpt_dir: str) -> Sequence[str]:
+  """Returns paths of the checkpoints in `ckpt_dir` in ascending step order."""
+  if not gfile.isdir(ckpt_dir):
+    raise ValueError(
+        'Checkpoint path(s) must be valid directories when using '
+        "restore mode 'all' or 'latest'."
+    )
+  # Check if this is a TensorFlow checkpoint dir.
+  tf_ckpt_state = tf.train.get_checkpoint_state(ckpt_dir)
+
+  if tf_ckpt_state:
+    return tf_ckpt_state.all_model_checkpoint_paths
+  return [
+      os.path.join(ckpt_dir, f'checkpoint_{step}')
+      for step in checkpoints.all_steps(ckpt_dir)
+  ]
+
+
 def get_first_valid_restore_config_and_paths(
     restore_cfgs: Sequence[RestoreCheckpointConfig],
 ) -> Tuple[Optional[RestoreCheckpointConfig], Sequence[str]]:
@@ -938,42 +965,65 @@ def get_first_valid_restore_config_and_paths(
     checkpoints at each of the provided paths and filters the returned paths
     accordingly.
   """
+  # Listing checkpoint directories can be slow on remote filesystems, so scan
+  # all directories that may be consulted concurrently. Results are consumed
+  # in config order below, so the first valid config still wins and errors
+  # are only raised for directories that would have been scanned sequentially.
+  scan_dirs = []
   for restore_cfg in restore_cfgs:
-    paths = (
-        [restore_cfg.path]
-        if isinstance(restore_cfg.path, str)
-        else restore_cfg.path
-    )
     if restore_cfg.mode == 'specific':
-      return restore_cfg, paths
-    elif restore_cfg.mode in ('all', 'latest'):
-      for ckpt_dir in paths:
-        if not gfile.isdir(ckpt_dir):
-          raise ValueError(
-              'Checkpoint path(s) must be valid directories when using '
-              "restore mode 'all' or 'latest'."
-          )
-        # Check if this is a TensorFlow checkpoint dir.
-        tf_ckpt_state = tf.train.get_checkpoint_state(ckpt_dir)
+      break
+    if restore_cfg.mode in ('all', 'latest'):
+      scan_dirs.extend(_get_restore_paths(restore_cfg))
+  scan_dirs = list(dict.fromkeys(scan_dirs))
+
+  # Only use a thread pool when there is more than one directory to scan, so
+  # the common single-directory case runs inline.
+  executor = None
+  if len(scan_dirs) > 1:
+    executor = thread.ThreadPoolExecutor(
+        max_workers=min(len(scan_dirs), _MAX_CHECKPOINT_SCAN_THREADS)
+    )
+    ckpt_paths_futures = {
+        ckpt_dir: executor.submit(_get_checkpoint_paths, ckpt_dir)
+        for ckpt_dir in scan_dirs
+    }
 
-        if tf_ckpt_state:
-          ckpt_paths = tf_ckpt_state.all_model_checkpoint_paths
-        else:
-          ckpt_paths = [
-              os.path.join(ckpt_dir, f'checkpoint_{step}')
-              for step in checkpoints.all_steps(ckpt_dir)
-          ]
-        if not ckpt_paths:
-          logging.info(
-              'No checkpoints found in specified directory: %s', ckpt_dir
-          )
-          continue
-        if restore_cfg.mode == 'latest':
-          logging.info('Using latest T5X checkpoint.')
-          ckpt_paths = ckpt_paths[-1:]
-        return restore_cfg, ckpt_paths
-    else:
-      logging.error('Unsupported checkpoint restore mode: %s', restore_cfg.mode)
+    def get_checkpoint_paths(ckpt_dir):
+      return ckpt_paths_futures[ckpt_dir].result()
+
+  else:
+    # Per-call cache, in case several configs share the one directory.
+    get_checkpoint_paths = functools.cache(_get_checkpoint_paths)
+
+  try:
+    for restore_cfg in restore_cfgs:
+      paths = _get_restore_paths(restore_cfg)
+      if restore_cfg.mode == 'specific':
+        return restore_cfg, paths
+      elif restore_cfg.mode in ('all', 'latest'):
+        for ckpt_dir in paths:
+          ckpt_paths = get_checkpoint_paths(ckpt_dir)
+          if not ckpt_paths:
+            logging.info(
+                'No checkpoints found in specified directory: %s', ckpt_dir
+            )
+            continue
+          if restore_cfg.mode == 'latest':
+            logging.info('Using latest T5X checkpoint.')
+            ckpt_paths = ckpt_paths[-1:]
+          return restore_cfg, ckpt_paths
+      else:
+        logging.error(
+            'Unsupported checkpoint restore mode: %s', restore_cfg.mode
+        )
+  finally:
+    if executor is not None:
+      # Don't block on scans of directories that are no longer needed. Pending
+      # scans are cancelled, but scans that already started keep running in
+      # the background after this function returns; their results are
+      # discarded.
+      executor.shutdown(wait=False, cancel_futures=True)
   return None, []
 
 
@@ -1055,8 +1105,9 @@ class TrainStateInitializer:
       return train_state_lib.InferenceState.create(initial_variables)
 
     self._partitioner = partitioner
+    # Only the shape of the key matters here, so don't materialize one.
     self.global_train_state_shape = jax.eval_shape(
-        initialize_train_state, rng=jax.random.PRNGKey(0)
+        initialize_train_state, rng=jax.eval_shape(jax.random.PRNGKey, 0)
     )
     self.train_state_axes = partitioner.get_mesh_axes(
         self.global_train_state_shape
@@ -1659,9 +1710,12 @@ def get_infer_fn(
       )
       ds = ds.concatenate(pad_ds)
 
-    # Shard the infer dataset across replica sets.
-    sharded_ds = ds.shard(num_shards, shard_id).batch(
-        per_shard_batch_size, drop_remainder=True
+    # Shard the infer dataset across replica sets. Prefetch so that the input
+    # pipeline overlaps with dispatch of the partitioned infer step.
+    sharded_ds = (
+        ds.shard(num_shards, shard_id)
+        .batch(per_shard_batch_size, drop_remainder=True)
+        .prefetch(tf.data.experimental.AUTOTUNE)
     )
     multihost_assert_equal(
         jnp.array(len(sharded_ds)), 'Dataset lengths do not agree across hosts.'
@@ -1785,17 +1839,15 @@ def get_infer_fn(
 
     # Translate to List[...] by flattening inferences making sure to
     # preserve structure of individual elements (inferences are not assumed to
-    # be simple np.array). Finally, zip inferences with corresponding indices
-    # and convert leaf np.arrays into lists.
+    # be simple np.array). Leaf np.arrays are converted into lists once for the
+    # whole batch dimension rather than once per example. Finally, zip
+    # inferences with corresponding indices.
     all_inferences, struct = jax.tree_util.tree_flatten(all_inferences)
     all_inferences = map(
         functools.partial(jax.tree_util.tree_unflatten, struct),
-        zip(*all_inferences),
-    )
-    indices_and_outputs = list(zip(all_indices, all_inferences))
-    indices_and_outputs = jax.tree.map(
-        lambda x: np.array(x).tolist(), indices_and_outputs
+        zip(*[np.asarray(x).tolist() for x in all_inferences]),
     )
+    indices_and_outputs = list(zip(all_indices.tolist(), all_inferences))
     if len(indices_and_outputs) != original_ds_length:
       raise ValueError(
           'Size of indices_and_outputs does not match length of original '
@@ -18,6 +18,7 @@ import dataclasses
 import functools
 import os
 import re
+import types
 from typing import Mapping, Optional
 import unittest
 
@@ -819,6 +820,16 @@ class UtilsTest(parameterized.TestCase):
     )
 
 
+def create_checkpoint_dirs(ckptdir, steps):
+  """Creates a T5X checkpoint dir per step in `ckptdir`; returns their paths."""
+  paths = []
+  for step in steps:
+    step_dir = ckptdir.mkdir(f"checkpoint_{step}")
+    step_dir.create_file("checkpoint")
+    paths.append(step_dir.full_path)
+  return paths
+
+
 @dataclasses.dataclass
 class MockTrainState:
   path: Optional[str] = None
@@ -851,12 +862,7 @@ class OrbaxRestoreTest(parameterized.TestCase):
     super().setUp()
 
     self.ckptdir = self.create_tempdir(name="primary_checkpoints")
-    steps = (2, 3)
-    self.paths = []
-    for s in steps:
-      step_dir = self.ckptdir.mkdir(f"checkpoint_{s}")
-      step_dir.create_file("checkpoint")
-      self.paths += [step_dir.full_path]
+    self.paths = create_checkpoint_dirs(self.ckptdir, steps=(2, 3))
 
   def test_orbax_restore(self):
     # Properties of config not needed in this test.
@@ -874,6 +880,11 @@ class OrbaxRestoreTest(parameterized.TestCase):
 
 class TrainStateInitializerTest(parameterized.TestCase):
 
+  @classmethod
+  def setUpClass(cls):
+    super().setUpClass()
+    cls.init_rng = jax.random.key(13)
+
   def setUp(self):
     super().setUp()
 
@@ -893,7 +904,7 @@ class TrainStateInitializerTest(parameterized.TestCase):
         "twos": (2, 2),
         "threes": (3, 3),
     }
-    types = {
+    dtypes = {
         "ones": int,
         "twos": float,
         "threes": int,
@@ -913,16 +924,11 @@ class TrainStateInitializerTest(parameterized.TestCase):
     init_fn.__self__ = None
 
     self.train_state_init = utils.TrainStateInitializer(
-        None, init_fn, shapes, partitioner, types
+        None, init_fn, shapes, partitioner, dtypes
     )
 
     self.ckptdir = self.create_tempdir(name="primary_checkpoints")
-    steps = (2, 3)
-    self.paths = []
-    for s in steps:
-      step_dir = self.ckptdir.mkdir(f"checkpoint_{s}")
-      step_dir.create_file("checkpoint")
-      self.paths += [step_dir.full_path]
+    self.paths = create_checkpoint_dirs(self.ckptdir, steps=(2, 3))
 
   def test_from_checkpoints_specific(self):
     # multiple paths
@@ -950,6 +956,49 @@ class TrainStateInitializerTest(parameterized.TestCase):
     restored_state = self.train_state_init.from_checkpoint([ckpt_cfg])
     self.assertEqual(self.paths[-1], restored_state.path)
 
+  def test_from_checkpoint_scans_each_dir_once(self):
+    ckpt_cfg = utils.RestoreCheckpointConfig(
+        path=self.ckptdir.full_path,
+        mode="latest",
+        checkpointer_cls=MockCheckpointer,
+    )
+    empty_ckptdir = self.create_tempdir(name="empty_checkpoints")
+    empty_ckpt_cfg = utils.RestoreCheckpointConfig(
+        path=empty_ckptdir.full_path,
+        mode="latest",
+        checkpointer_cls=MockCheckpointer,
+    )
+    with mock.patch.object(
+        checkpoints, "all_steps", wraps=checkpoints.all_steps
+    ) as mock_all_steps:
+      restored = self.train_state_init.from_checkpoint(
+          [empty_ckpt_cfg, empty_ckpt_cfg, ckpt_cfg]
+      )
+    self.assertEqual(self.paths[-1], restored.path)
+    # Directories shared by several configs are only scanned once per call.
+    self.assertEqual(mock_all_steps.call_count, 2)
+    mock_all_steps.assert_has_calls(
+        [
+            mock.call(empty_ckptdir.full_path),
+            mock.call(self.ckptdir.full_path),
+        ],
+        any_order=True,
+    )
+
+  def test_from_checkpoint_latest_sees_new_checkpoint(self):
+    ckpt_cfg = utils.RestoreCheckpointConfig(
+        path=self.ckptdir.full_path,
+        mode="latest",
+        checkpointer_cls=MockCheckpointer,
+    )
+    restored_state = self.train_state_init.from_checkpoint([ckpt_cfg])
+    self.assertEqual(self.paths[-1], restored_state.path)
+
+    # Checkpoints added after an earlier restore are picked up.
+    (new_path,) = create_checkpoint_dirs(self.ckptdir, steps=(4,))
+    restored_state = self.train_state_init.from_checkpoint([ckpt_cfg])
+    self.assertEqual(new_path, restored_state.path)
+
   def test_from_checkpoint_multiple_configs(self):
     # uses first checkpoint with files present.
     ckpt_cfg = utils.RestoreCheckpointConfig(
@@ -958,9 +1007,7 @@ class TrainStateInitializerTest(parameterized.TestCase):
         checkpointer_cls=MockCheckpointer,
     )
     secondary_ckptdir = self.create_tempdir(name="secondary_checkpoints")
-    for s in (4, 5):
-      step_dir = secondary_ckptdir.mkdir(f"checkpoint_{s}")
-      step_dir.create_file("checkpoint")
+    create_checkpoint_dirs(secondary_ckptdir, steps=(4, 5))
     secondary_ckpt_cfg = utils.RestoreCheckpointConfig(
         path=secondary_ckptdir.full_path,
         mode="latest",
@@ -987,9 +1034,28 @@ class TrainStateInitializerTest(parameterized.TestCase):
     restored = self.train_state_init.from_checkpoint([empty_ckpt_cfg, ckpt_cfg])
     self.assertEqual(self.paths[-1], restored.path)
 
+  def test_from_checkpoint_multiple_configs_one_invalid(self):
+    ckpt_cfg = utils.RestoreCheckpointConfig(
+        path=self.ckptdir.full_path,
+        mode="latest",
+        checkpointer_cls=MockCheckpointer,
+    )
+    invalid_ckpt_cfg = utils.RestoreCheckpointConfig(
+        path=os.path.join(self.ckptdir.full_path, "does_not_exist"),
+        mode="latest",
+        checkpointer_cls=MockCheckpointer,
+    )
+    # Configs after the first valid one are never consulted.
+    restored = self.train_state_init.from_checkpoint(
+        [ckpt_cfg, invalid_ckpt_cfg]
+    )
+    self.assertEqual(self.paths[-1], restored.path)
+    with self.assertRaisesRegex(ValueError, "must be valid directories"):
+      self.train_state_init.from_checkpoint([invalid_ckpt_cfg, ckpt_cfg])
+
   def test_from_scratch(self):
     self.assertTrue(
-        self.train_state_init.from_scratch(jax.random.PRNGKey(13)).from_scratch
+        self.train_state_init.from_scratch(self.init_rng).from_scratch
     )
 
   def test_from_checkpoint_or_scratch(self):
@@ -1005,32 +1071,35 @@ class TrainStateInitializerTest(parameterized.TestCase):
         checkpointer_cls=MockCheckpointer,
     )
 
-    init_rng = jax.random.PRNGKey(13)
-
     # ckpt_cfg has checkpoints, restore from there
     restored = self.train_state_init.from_checkpoint_or_scratch(
-        [empty_ckpt_cfg, ckpt_cfg], init_rng=init_rng
+        [empty_ckpt_cfg, ckpt_cfg], init_rng=self.init_rng
     )
     self.assertEqual(self.paths[-1], restored.path)
     self.assertFalse(restored.from_scratch)
 
     # no checkpoints available, init from scratch
     initialized = self.train_state_init.from_checkpoint_or_scratch(
-        [empty_ckpt_cfg], init_rng=init_rng
+        [empty_ckpt_cfg], init_rng=self.init_rng
     )
     self.assertTrue(initialized.from_scratch)
 
 
 class MutableGetInferFnTest(parameterized.TestCase):
 
+  @classmethod
+  def setUpClass(cls):
+    super().setUpClass()
+    cls.global_mesh = test_utils.create_global_mesh(
+        (1, 1, 1), ("model", "data", "chips")
+    )
+
   @parameterized.parameters((True,), (False,))
   def test_get_infer_fn_predict(self, use_flax_mutables):
     batch_size = 2
     weight_const = 7
     mutable_const = 5 if use_flax_mutables else 0
-    global_mesh = test_utils.create_global_mesh(
-        (1, 1, 1), ("model", "data", "chips")
-    )
+    global_mesh = self.global_mesh
 
     def predict_batch(params, batch, flax_mutables):
       result = (
@@ -1057,14 +1126,16 @@ class MutableGetInferFnTest(parameterized.TestCase):
       return partitioning.PjittedFnWithContext(fn, global_mesh)
 
     if use_flax_mutables:
-      flax_mutables_train_state = {"mutable_w": np.full((1,), mutable_const)}
+      flax_mutables_train_state = {
+          "mutable_w": np.full((1,), mutable_const, dtype=np.int32)
+      }
       flax_mutables_train_state_axes = {"mutable_w": PartitionSpec("model")}
     else:
       flax_mutables_train_state = None
       flax_mutables_train_state_axes = None
 
     train_state = get_mock_train_state(
-        params={"weight": np.full((1,), weight_const)},
+        params={"weight": np.full((1,), weight_const, dtype=np.int32)},
         flax_mutables=flax_mutables_train_state,
     )
     train_state_axes = get_mock_train_state(
@@ -1072,41 +1143,35 @@ class MutableGetInferFnTest(parameterized.TestCase):
         flax_mutables=flax_mutables_train_state_axes,
     )
 
-    partitioner = mock.Mock()
-    partitioner.data_partition_spec = PartitionSpec(
-        "data",
+    partitioner = types.SimpleNamespace(
+        data_partition_spec=PartitionSpec("data"),
+        get_data_layout=get_data_layout,
+        partition=partition,
+        mesh=global_mesh,
     )
-    partitioner.get_data_layout = get_data_layout
-    partitioner.partition = partition
-    partitioner.mesh = global_mesh
 
-    def as_sharded_array(arr, axes, mesh=None):
-      with mesh:
-        return pjit(lambda x: x, in_shardings=None, out_shardings=axes)(arr)
+    def as_sharded_array(arr, axes):
+      return jax.device_put(arr, jax.sharding.NamedSharding(global_mesh, axes))
 
     train_state.params = jax.tree_util.tree_map(
-        functools.partial(as_sharded_array, mesh=global_mesh),
-        train_state.params,
-        train_state_axes.params,
+        as_sharded_array, train_state.params, train_state_axes.params
     )
 
     infer_fn = utils.get_infer_fn(
         predict_batch, batch_size, train_state_axes, partitioner=partitioner
     )
 
+    inputs = np.broadcast_to(np.arange(8, dtype=np.int32)[:, None], (8, 2))
     ds = tf.data.Dataset.from_tensor_slices({
-        "a": np.transpose(np.tile(np.arange(8), (2, 1))),
-        "b": np.transpose(np.tile(np.arange(8), (2, 1))),
+        "a": inputs,
+        "b": inputs,
     }).enumerate()
 
     all_indices, all_inferences = zip(*infer_fn(ds, train_state))
 
     np.testing.assert_equal(all_indices, np.arange(8))
     np.testing.assert_equal(
-        all_inferences,
-        np.transpose(
-            np.tile(np.arange(8) * (weight_const + mutable_const), (2, 1))
-        ),
+        all_inferences, inputs * (weight_const + mutable_const)
     )
 
 